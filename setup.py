@@ -11,7 +11,7 @@ setup(
         "torch",
         "transformers",
         "numpy",
-        "soundfile",
+        "scipy",
         "langdetect",
         "langid",
     ],
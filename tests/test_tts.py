@@ -0,0 +1,211 @@
+import io
+import json
+import struct
+import threading
+import time
+import wave
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from scipy import signal
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("langid")
+pytest.importorskip("langdetect")
+
+from tts_sdk import tts
+
+
+def _read_wav(buffer):
+    with wave.open(io.BytesIO(buffer.getvalue())) as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getsampwidth() == 2
+        assert wav.getframerate() == 16000
+        return wav.getnframes()
+
+
+@pytest.fixture
+def tiny_model(tmp_path, monkeypatch):
+    """
+    Saves a tiny randomly initialized VITS model and tokenizer locally and points "en" at it.
+    """
+    model_dir = tmp_path / "tiny-vits"
+    model_dir.mkdir()
+
+    vocab = {token: i for i, token in enumerate(["<pad>"] + list(" abcdefghijklmnopqrstuvwxyz'.,?!"))}
+    (model_dir / "vocab.json").write_text(json.dumps(vocab), encoding="utf-8")
+    tokenizer = transformers.VitsTokenizer(
+        str(model_dir / "vocab.json"), pad_token="<pad>", unk_token="<pad>", phonemize=False
+    )
+
+    config = transformers.VitsConfig(
+        vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1, num_attention_heads=2, ffn_dim=16,
+        flow_size=8, spectrogram_bins=9, upsample_initial_channel=16, upsample_rates=[4, 4],
+        upsample_kernel_sizes=[8, 8], resblock_kernel_sizes=[3], resblock_dilation_sizes=[[1]],
+        prior_encoder_num_flows=1, prior_encoder_num_wavenet_layers=1, posterior_encoder_num_wavenet_layers=1,
+        duration_predictor_num_flows=1, duration_predictor_filter_channels=8, depth_separable_num_layers=1,
+    )
+    transformers.VitsModel(config).save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+
+    model_names = list(tts._MODEL_NAMES)
+    model_names[tts._LANG_IDS["en"]] = str(model_dir)
+    monkeypatch.setattr(tts, "_MODEL_NAMES", tuple(model_names))
+    monkeypatch.setattr(tts, "MODEL_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(tts, "loaded_models", tts.OrderedDict())
+    tts._tokenize.cache_clear()
+    yield model_dir
+    tts._tokenize.cache_clear()
+
+
+def test_speak_with_lang_returns_wav(tiny_model):
+    buffer = tts.speak_with_lang("en", "hello there. how are you?", speed=1.5)
+
+    assert buffer is not None
+    assert _read_wav(buffer) > 0
+
+
+def test_speak_with_lang_skips_sentences_without_tokens(tiny_model):
+    buffer = tts.speak_with_lang("en", "hello there. 123")
+
+    assert buffer is not None
+    assert _read_wav(buffer) > 0
+
+
+def test_speak_with_lang_batch_returns_one_wav_per_text(tiny_model):
+    buffers = tts.speak_with_lang("en", ["hello there", "hi"])
+
+    assert len(buffers) == 2
+    assert all(_read_wav(buffer) > 0 for buffer in buffers)
+    assert tts.speak_with_lang("en", []) == tts.speak([]) == []
+
+
+def test_failing_compiled_model_falls_back_to_eager(tiny_model, monkeypatch):
+    def failing_backend(graph_module, example_inputs):
+        raise RuntimeError("backend unavailable")
+
+    compile_model = torch.compile
+    monkeypatch.setattr(tts, "COMPILE_MODELS", True)
+    monkeypatch.setattr(tts.torch, "compile", lambda model, **kwargs: compile_model(model, backend=failing_backend))
+
+    assert tts.speak_with_lang("en", "hello there") is not None
+    model = tts.get_model("en")[0]
+    assert isinstance(model, tts.VitsModel)  # The cache now holds the eager model
+
+
+def _alias_languages(monkeypatch, model_dir, *langs):
+    model_names = list(tts._MODEL_NAMES)
+    for lang in langs:
+        model_names[tts._LANG_IDS[lang]] = str(model_dir)
+    monkeypatch.setattr(tts, "_MODEL_NAMES", tuple(model_names))
+
+
+def test_get_model_evicts_least_recently_used(tiny_model, monkeypatch):
+    _alias_languages(monkeypatch, tiny_model, "fr", "de")
+    monkeypatch.setattr(tts, "MAX_MODELS", 2)
+
+    tts.get_model("en")
+    tts.get_model("fr")
+    tts.get_model("en")  # A hit makes "fr" the least recently used
+    tts.get_model("de")
+
+    assert list(tts.loaded_models) == [tts._LANG_IDS["en"], tts._LANG_IDS["de"]]
+
+    monkeypatch.setattr(tts, "MAX_MODELS", 1)
+    tts.get_model("fr")
+
+    assert list(tts.loaded_models) == [tts._LANG_IDS["fr"]]
+
+
+def test_concurrent_get_model_loads_once(tiny_model, monkeypatch):
+    calls = []
+    load_vits_model = tts._load_vits_model
+
+    def slow_load(lang, model_name):
+        calls.append(lang)
+        time.sleep(0.2)  # Keep the load in flight while the other threads arrive
+        return load_vits_model(lang, model_name)
+
+    monkeypatch.setattr(tts, "_load_vits_model", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tts.get_model("en"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["en"]
+    assert len(results) == 8
+    assert all(result[0] is results[0][0] is not None for result in results)
+
+
+def test_corrupt_snapshot_falls_back_to_from_pretrained(tiny_model):
+    assert tts.get_model("en")[0] is not None
+    (snapshot,) = (tiny_model.parent / "cache").glob("*.pt")
+    snapshot.write_bytes(b"not a checkpoint")
+    tts.loaded_models.clear()
+
+    assert tts.get_model("en")[0] is not None
+    assert snapshot.read_bytes() != b"not a checkpoint"
+    tts.loaded_models.clear()  # Reload from the rewritten snapshot
+    assert tts.speak_with_lang("en", "hello there") is not None
+
+
+def test_snapshot_reload_skips_from_pretrained(tiny_model, monkeypatch):
+    assert tts.get_model("en")[0] is not None
+    tts.loaded_models.clear()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("from_pretrained should not be called when a snapshot exists")
+
+    monkeypatch.setattr(tts.VitsModel, "from_pretrained", fail)
+    model = tts.get_model("en")[0]
+
+    assert model is not None
+    assert not any(t.is_meta for t in list(model.parameters()) + list(model.buffers()))
+    assert tts.speak_with_lang("en", "hello there") is not None
+
+
+def test_detect_language_returns_unknown_on_bad_input():
+    assert tts.detect_language(None) == "unknown"
+    assert tts.detect_language("Guten Tag, wie geht es Ihnen?") == "de"
+
+
+def test_detect_language_reports_unsupported_languages_as_unknown():
+    assert tts.detect_language("Bon dia, com estàs? Avui fa molt bon temps a Barcelona.") == "unknown"
+    assert tts.detect_language("Goeie môre, hoe gaan dit met jou? Ek is baie bly om jou te sien.") == "unknown"
+
+
+@pytest.mark.parametrize("speed", [0.75, 1.37, 1.5, 2.0])
+def test_time_stretch_matches_default_resample_poly(speed):
+    waveform = np.sin(np.linspace(0, 200, 16000)).astype(np.float32)
+    ratio = Fraction(speed).limit_denominator(1000)
+    up, down = ratio.denominator, ratio.numerator
+
+    stretched = tts.time_stretch(waveform, speed)
+
+    assert stretched.dtype == np.float32
+    assert len(stretched) == -(-len(waveform) * up // down)
+    np.testing.assert_allclose(stretched, signal.resample_poly(waveform, up, down), atol=1e-5)
+
+
+@pytest.mark.parametrize("speed", [1.0, 1.0001, 0.9996])
+def test_time_stretch_returns_input_when_speed_rounds_to_one(speed, caplog):
+    waveform = np.sin(np.linspace(0, 200, 16000)).astype(np.float32)
+
+    assert tts.time_stretch(waveform, speed) is waveform
+    assert not caplog.records  # Not via the "Error adjusting speed" fallback
+
+
+def test_pack_pcm16_wav_writes_header_and_clipped_samples():
+    waveform = np.array([0.0, 0.5, -0.5, 1.0, -1.0, 2.0, -2.0], dtype=np.float32)
+    out = bytearray(44 + 2 * len(waveform))
+
+    assert tts._pack_pcm16_wav(waveform, 16000, out) == len(out)
+    assert struct.unpack_from("<4sI4s4sIHHIIHH4sI", out) == (
+        b"RIFF", 36 + 14, b"WAVE", b"fmt ", 16, 1, 1, 16000, 32000, 2, 16, b"data", 14,
+    )
+    samples = np.frombuffer(out, dtype="<i2", offset=44)
+    assert samples.tolist() == [0, 16383, -16383, 32767, -32767, 32767, -32767]
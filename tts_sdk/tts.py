@@ -1,11 +1,22 @@
 import torch
 import numpy as np
+import inspect
 import io
-import soundfile as sf
-from transformers import VitsModel, AutoTokenizer
-from langdetect import detect
+import itertools
+import logging
+import os
+import re
+import struct
+from collections import OrderedDict
+from functools import lru_cache
+from fractions import Fraction
+from threading import Lock
+from scipy import signal
+from transformers import VitsConfig, VitsModel, AutoTokenizer
+from langdetect import DetectorFactory, PROFILES_DIRECTORY
 from langid.langid import classify
-import sounddevice as sd
+
+log = logging.getLogger(__name__)
 
 supported_languages = {
     # 🌍 Indian Languages
@@ -79,7 +90,89 @@ supported_languages = {
     "sk": "facebook/mms-tts-slk",  # Slovak
 }
 
-loaded_models = {}
+# Integer language ids, built once; per-request lookups below key on these instead of strings
+_LANG_IDS = {lang: i for i, lang in enumerate(supported_languages)}
+_MODEL_NAMES = tuple(supported_languages.values())
+
+# Keyed by language id, least-recently-used first; bounded so long-running servers don't
+# accumulate every language
+loaded_models = OrderedDict()
+MAX_MODELS = max(1, int(os.getenv("TTS_MAX_CACHED_MODELS", "4")))
+
+# _cache_lock guards loaded_models; the per-language lock serializes loading of that language
+_cache_lock = Lock()
+_load_locks = tuple(Lock() for _ in _MODEL_NAMES)
+
+# Inputs longer than this many tokens release cached CUDA blocks after synthesis (0 disables).
+# Each flush costs a little time, but peak VRAM stays bounded across varied input lengths.
+EMPTY_CACHE_TOKENS = int(os.getenv("TTS_EMPTY_CACHE_TOKENS", "256"))
+
+# torch.compile is opt-in: it fails on some platforms, and every load (including reloads after
+# an LRU eviction) pays the compile cost again on its first call
+COMPILE_MODELS = os.getenv("TTS_COMPILE", "0") == "1"
+
+# Local snapshots of model weights, loaded instead of the Hugging Face from_pretrained pipeline
+MODEL_CACHE_DIR = os.getenv("TTS_MODEL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tts_sdk"))
+
+# mmap and weights_only are only passed to torch.load on versions that accept them
+_TORCH_LOAD_KWARGS = {
+    key: True for key in ("mmap", "weights_only") if key in inspect.signature(torch.load).parameters
+}
+
+# Snapshots are only faster when the model can be built on the meta device and given the
+# loaded tensors directly (load_state_dict(assign=True), torch 2.1+)
+_SNAPSHOTS_SUPPORTED = "assign" in inspect.signature(torch.nn.Module.load_state_dict).parameters
+
+
+def _load_vits_model(lang, model_name):
+    """
+    Loads the VITS model for a language, preferring a local snapshot.
+
+    The first load goes through `VitsModel.from_pretrained` and writes the config and
+    state_dict to MODEL_CACHE_DIR. Later loads (e.g. after a restart) memory-map that
+    snapshot, build the model on the meta device and assign the loaded tensors, which skips
+    both the Hugging Face lookup and random weight initialization. A snapshot that cannot be
+    loaded (corrupt, older format, or saved by a torch version with different state_dict keys)
+    is replaced by a fresh `from_pretrained` load.
+
+    Args:
+        lang (str): Language code (e.g., "hi" for Hindi, "en" for English).
+        model_name (str): The Hugging Face model name for the language.
+
+    Returns:
+        VitsModel: The loaded model on the CPU.
+    """
+    # Keyed by model name, so remapping a language never picks up another model's weights
+    snapshot_path = os.path.join(MODEL_CACHE_DIR, re.sub(r"[^\w.-]+", "--", model_name) + ".pt")
+
+    if not _SNAPSHOTS_SUPPORTED:
+        return VitsModel.from_pretrained(model_name)
+
+    if os.path.exists(snapshot_path):
+        try:
+            snapshot = torch.load(snapshot_path, map_location="cpu", **_TORCH_LOAD_KWARGS)
+            with torch.device("meta"):
+                model = VitsModel(VitsConfig.from_dict(snapshot["config"]))
+            model.load_state_dict(snapshot["state_dict"], assign=True)
+
+            # Non-persistent buffers are not in the state_dict and would be left on meta
+            if any(t.is_meta for t in itertools.chain(model.parameters(), model.buffers())):
+                raise RuntimeError("snapshot does not cover every parameter and buffer")
+            return model
+        except Exception as e:
+            log.warning("Ignoring unusable snapshot for model %s: %s", lang, e)
+
+    model = VitsModel.from_pretrained(model_name)
+    try:
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        torch.save({"config": model.config.to_dict(), "state_dict": model.state_dict()}, tmp_path)
+        os.replace(tmp_path, snapshot_path)  # Atomic, so readers never see a partial file
+    except (OSError, RuntimeError) as e:
+        log.warning("Could not cache model %s to disk: %s", lang, e)
+
+    return model
+
 
 def get_model(lang):
     """
@@ -89,31 +182,143 @@ def get_model(lang):
         lang (str): Language code (e.g., "hi" for Hindi, "en" for English).
 
     Returns:
-        tuple: (model, tokenizer) if successful, otherwise (None, None).
+        tuple: (model, tokenizer, device) if successful, otherwise (None, None, None).
     """
+    lang_id = _LANG_IDS.get(lang)
+    if lang_id is None:
+        log.error("Model for language '%s' is not available.", lang)
+        return None, None, None
+
     try:
-        if lang not in loaded_models:
-            print(f"🚀 Loading model for {lang}...")
-            model = VitsModel.from_pretrained(supported_languages[lang])
-            tokenizer = AutoTokenizer.from_pretrained(supported_languages[lang])
+        with _cache_lock:
+            entry = loaded_models.get(lang_id)
+            if entry is not None:
+                loaded_models.move_to_end(lang_id)
+                return entry
+
+        with _load_locks[lang_id]:
+            # Another thread may have finished loading this language while we waited
+            with _cache_lock:
+                entry = loaded_models.get(lang_id)
+            if entry is not None:
+                return entry
+
+            log.info("Loading model for %s...", lang)
+            model_name = _MODEL_NAMES[lang_id]
+            model = _load_vits_model(lang, model_name)
+            tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
 
             model.eval()  # Set model to evaluation mode
-            loaded_models[lang] = (model, tokenizer)
 
-        return loaded_models[lang]
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = model.to(device)
+            if device == "cuda":
+                model = model.half()  # FP16 weights for Tensor Core kernels
+
+            if COMPILE_MODELS and hasattr(torch, "compile"):
+                # Compilation is lazy; a failure surfaces on the first forward (see _forward).
+                # dynamic=True avoids recompiling for every new token length
+                model = torch.compile(model, mode="reduce-overhead", dynamic=True)
+
+            entry = (model, tokenizer, device)
+            with _cache_lock:
+                while len(loaded_models) >= MAX_MODELS:
+                    _, (old_model, _, old_device) = loaded_models.popitem(last=False)
+                    del old_model
+                    if old_device == "cuda":
+                        torch.cuda.empty_cache()
+
+                loaded_models[lang_id] = entry
+
+        return entry
 
-    except KeyError:
-        print(f"❌ Model for language '{lang}' is not available.")
     except Exception as e:
-        print(f"⚠️ Failed to load model {lang}: {e}")
+        log.warning("Failed to load model %s: %s", lang, e)
     
-    return None, None  # Return None if model loading fails
+    return None, None, None  # Return None if model loading fails
+
+
+@lru_cache(maxsize=512)
+def _tokenize(lang, text):
+    """
+    Tokenizes text with the tokenizer of an already loaded language model.
+
+    Results are cached so repeated phrases skip tokenization entirely. For models
+    on CUDA the tensor is placed in pinned host memory, so it is pinned once per
+    cached phrase and can be copied to the GPU asynchronously.
+
+    Args:
+        lang (str): The language code of a supported model, normally already loaded.
+        text (str): The input text to tokenize.
+
+    Returns:
+        torch.Tensor: The `input_ids` tensor of shape (1, sequence_length).
+    """
+    # Reload if another thread evicted the model since the caller's get_model
+    _, tokenizer, device = loaded_models.get(_LANG_IDS[lang]) or get_model(lang)
+    input_ids = tokenizer(text, return_tensors="pt")["input_ids"]
+    if device == "cuda":
+        input_ids = input_ids.pin_memory()
+    return input_ids
+
+
+def _forward(lang, model, inputs):
+    """
+    Runs a forward pass, falling back to the eager model if a compiled one fails.
+
+    `torch.compile` only compiles on the first call, so that is where it fails on unsupported
+    platforms. If the eager model then succeeds, it replaces the compiled one in `loaded_models`.
+
+    Args:
+        lang (str): The language code of the model.
+        model (torch.nn.Module): The model returned by `get_model`, compiled or not.
+        inputs (dict): Keyword arguments for the forward pass.
+
+    Returns:
+        tuple: (output, model) where `model` is the one to use for further calls.
+    """
+    try:
+        return model(**inputs), model
+    except Exception as e:
+        eager = getattr(model, "_orig_mod", None)
+        if eager is None:
+            raise
+        output = eager(**inputs)  # Raises again if the inputs, not compilation, are at fault
+        log.warning("Compiled model for %s failed, using the eager model: %s", lang, e)
+
+    lang_id = _LANG_IDS[lang]
+    with _cache_lock:
+        entry = loaded_models.get(lang_id)
+        if entry is not None and entry[0] is model:
+            loaded_models[lang_id] = (eager,) + entry[1:]
+
+    return output, eager
+
+
+def _load_detector_factory():
+    """
+    Builds a langdetect factory from all bundled profiles.
+
+    Profiles of unsupported languages are kept, so such text is detected as that language
+    (and reported as "unknown") rather than matched to the closest supported one.
+
+    Returns:
+        DetectorFactory: A factory whose profiles are loaded once and shared by all detections.
+    """
+    factory = DetectorFactory()
+    factory.load_profile(PROFILES_DIRECTORY)
+    return factory
+
+
+detector_factory = _load_detector_factory()
 
 
 def detect_language(text):
     """
     Detects the language of the given text.
 
+    Only the first 200 characters are classified, and results are cached by that prefix.
+
     Args:
         text (str): The input text for language detection.
 
@@ -121,16 +326,63 @@ def detect_language(text):
         str: Detected language code (e.g., "hi" for Hindi) or "unknown" if detection fails.
     """
     try:
-        lang, _ = classify(text)  # Fastest method
-        if lang in supported_languages:
-            return lang
-        detected = detect(text)
-        return detected if detected in supported_languages else "unknown"
+        return _detect_language(text[:200])
     except Exception as e:
-        print(f"⚠️ Language detection failed: {e}")
+        log.warning("Language detection failed: %s", e)
         return "unknown"
 
 
+@lru_cache(maxsize=1024)
+def _detect_language(text):
+    """
+    Classifies text with langid, falling back to the preloaded langdetect factory.
+
+    Args:
+        text (str): The (already truncated) text to classify.
+
+    Returns:
+        str: A supported language code, or "unknown" if neither classifier finds one.
+
+    Raises:
+        Exception: Any classifier error; `detect_language` turns it into "unknown".
+    """
+    lang, _ = classify(text)  # Fastest method
+    if lang in supported_languages:
+        return lang
+    detector = detector_factory.create()
+    detector.append(text)
+    detected = detector.detect().split("-")[0]  # e.g. "zh-cn" -> "zh"
+    return detected if detected in supported_languages else "unknown"
+
+
+@lru_cache(maxsize=64)
+def _resample_filter(speed):
+    """
+    Builds the polyphase resampling parameters for a speed factor.
+
+    The FIR filter matches the default anti-aliasing filter of `scipy.signal.resample_poly`
+    (Kaiser window, beta 5.0), but is designed once per speed instead of on every call.
+
+    Args:
+        speed (float): Speed factor (e.g., 1.5 for faster speech).
+
+    Returns:
+        tuple: (up, down, fir) where `fir` holds the read-only FIR filter coefficients, or
+            None when the speed rounds to 1/1 and no resampling is needed.
+    """
+    frac = Fraction(speed).limit_denominator(1000)
+    up, down = frac.denominator, frac.numerator
+    if up == down:
+        return up, down, None  # firwin rejects the 1.0 cutoff this ratio would need
+
+    max_rate = max(up, down)
+
+    fir = signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    fir.setflags(write=False)  # Shared by every call with this speed
+
+    return up, down, fir
+
+
 def time_stretch(waveform, speed):
     """
     Adjusts the speed of the audio waveform using time-stretching.
@@ -146,21 +398,82 @@ def time_stretch(waveform, speed):
         if speed == 1.0:
             return waveform  # No change to the waveform
         
-        num_samples = int(len(waveform) / speed)
-        indices = np.linspace(0, len(waveform) - 1, num_samples)
-        stretched_waveform = np.interp(indices, np.arange(len(waveform)), waveform)
+        # Polyphase resampling: output length is len(waveform) * up / down
+        up, down, fir = _resample_filter(float(speed))
+        if up == down:
+            return waveform  # Speeds such as 1.0001 round to no change
 
-        return stretched_waveform
+        waveform = np.ascontiguousarray(waveform, dtype=np.float32)
+        stretched_waveform = signal.resample_poly(waveform, up, down, window=fir)
+
+        return stretched_waveform.astype(np.float32, copy=False)
 
     except Exception as e:
-        print(f"⚠️ Error adjusting speed: {e}")
+        log.warning("Error adjusting speed: %s", e)
         return waveform  # Return original waveform if an error occurs
 
 
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")  # RIFF, fmt and data chunk headers: 44 bytes
+
+
+def _pack_pcm16_wav(waveform, sample_rate, out):
+    """
+    Writes a mono 16-bit PCM WAV file into a pre-sized, writable buffer.
+
+    Args:
+        waveform (numpy.ndarray): The audio waveform with samples in [-1.0, 1.0].
+        sample_rate (int): The sample rate in Hz.
+        out (memoryview or bytearray): Destination of at least 44 + 2 * len(waveform) bytes.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    data_size = 2 * len(waveform)
+    _WAV_HEADER.pack_into(
+        out, 0,
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,  # PCM, mono, 16-bit
+        b"data", data_size,
+    )
+
+    # Scale and clip in one float32 temporary, then cast straight into the output buffer
+    scaled = np.multiply(waveform, 32767.0, dtype=np.float32)
+    np.clip(scaled, -32767.0, 32767.0, out=scaled)
+    samples = np.frombuffer(out, dtype="<i2", count=len(waveform), offset=_WAV_HEADER.size)
+    np.copyto(samples, scaled, casting="unsafe")
+
+    return _WAV_HEADER.size + data_size
+
+
+def _encode_wav(waveform):
+    """
+    Encodes a float waveform as an in-memory 16 kHz, 16-bit PCM WAV file.
+
+    Args:
+        waveform (numpy.ndarray): The audio waveform with samples in [-1.0, 1.0].
+
+    Returns:
+        io.BytesIO: A buffer containing the WAV audio, positioned at the start.
+    """
+    # Pack directly into the BytesIO's own storage, so the WAV bytes are never copied
+    audio_buffer = io.BytesIO(bytes(_WAV_HEADER.size + 2 * len(waveform)))
+    with audio_buffer.getbuffer() as view:
+        _pack_pcm16_wav(waveform, 16000, view)
+
+    return audio_buffer
+
+
+# Sentence boundaries (Latin, Devanagari danda, CJK full stop) used to chunk long inputs
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।。])\s+")
+
+
 def synthesize_audio(text, lang, speed=1.0):
     """
     Converts text into speech using the specified language model and applies speed modification.
 
+    The text is synthesized one sentence at a time and the waveforms are concatenated, so peak
+    activation memory follows the longest sentence rather than the whole input.
+
     Args:
         text (str): The input text to be converted into speech.
         lang (str): The language code of the text.
@@ -170,26 +483,83 @@ def synthesize_audio(text, lang, speed=1.0):
         io.BytesIO: A buffer containing the generated speech audio.
     """
     try:
-        model, tokenizer = get_model(lang)
-        if not model:
+        model, tokenizer, device = get_model(lang)
+        if model is None:
             return None
 
-        inputs = tokenizer(text, return_tensors="pt")
-
-        with torch.no_grad():
-            output = model(**inputs).waveform.float()
+        sentences = [sentence for sentence in _SENTENCE_END_RE.split(text.strip()) if sentence] or [text]
+        # Tokenize every sentence up front; the VITS forward syncs with the GPU, so there is
+        # nothing for tokenization to overlap with inside the loop
+        token_ids = [_tokenize(lang, sentence) for sentence in sentences]
+        # Sentences of only digits, emoji or out-of-vocab characters tokenize to nothing;
+        # skip them, and fall back to the whole text only if every sentence is empty
+        token_ids = [input_ids for input_ids in token_ids if input_ids.shape[-1] > 0] or [_tokenize(lang, text)]
+        max_tokens = max(input_ids.shape[-1] for input_ids in token_ids)
+
+        waveforms = []
+        with torch.inference_mode(), torch.autocast(device, dtype=torch.float16, enabled=device == "cuda"):
+            for input_ids in token_ids:
+                input_ids = input_ids.to(device, non_blocking=True)
+                output, model = _forward(lang, model, {"input_ids": input_ids})
+                waveforms.append(output.waveform.float().squeeze(0))
+
+            output = torch.cat(waveforms)
+            waveform = output.cpu().numpy()
+
+        if device == "cuda" and 0 < EMPTY_CACHE_TOKENS < max_tokens:
+            del output, waveforms
+            torch.cuda.empty_cache()
 
-        waveform = output.squeeze().cpu().numpy()
         waveform = time_stretch(waveform, speed)  # Adjust speed
 
-        audio_buffer = io.BytesIO()
-        sf.write(audio_buffer, waveform, 16000, format="WAV")
-        audio_buffer.seek(0)
+        return _encode_wav(waveform)
+
+    except Exception as e:
+        log.error("Failed to generate speech: %s", e)
+        return None
+
+
+def synthesize_audio_batch(texts, lang, speed=1.0):
+    """
+    Converts several texts in the same language into speech with a single batched forward pass.
+
+    Args:
+        texts (list[str]): The input texts to be converted into speech.
+        lang (str): The language code of the texts.
+        speed (float, optional): Speed factor (default is 1.0).
+
+    Returns:
+        list[io.BytesIO]: One buffer per input text, in input order, or None if generation fails.
+    """
+    try:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        model, tokenizer, device = get_model(lang)
+        if model is None:
+            return None
+
+        inputs = tokenizer(texts, return_tensors="pt", padding=True)
+        if device == "cuda":
+            inputs = {k: v.pin_memory() for k, v in inputs.items()}
+        inputs = {k: v.to(device, non_blocking=True) for k, v in inputs.items()}
 
-        return audio_buffer
+        with torch.inference_mode(), torch.autocast(device, dtype=torch.float16, enabled=device == "cuda"):
+            output, model = _forward(lang, model, inputs)
+
+        # Padded waveforms; sequence_lengths gives the valid sample count of each one
+        waveforms = output.waveform.float().cpu().numpy()
+        lengths = output.sequence_lengths.tolist()
+
+        if device == "cuda" and 0 < EMPTY_CACHE_TOKENS < inputs["input_ids"].shape[-1]:
+            del output
+            torch.cuda.empty_cache()
+
+        return [_encode_wav(time_stretch(waveforms[i, :length], speed)) for i, length in enumerate(lengths)]
 
     except Exception as e:
-        print(f"❌ Failed to generate speech: {e}")
+        log.error("Failed to generate speech batch: %s", e)
         return None
 
 
@@ -197,25 +567,46 @@ def speak(text, speed=1.0):
     """
     Detects the language of the text and generates speech.
 
+    A list of texts is grouped by detected language and each group is synthesized as one batch.
+
     Args:
-        text (str): The input text to be spoken.
+        text (str or list[str]): The input text, or texts, to be spoken.
         speed (float, optional): Speed factor (default is 1.0).
 
     Returns:
         io.BytesIO: A buffer containing the generated speech audio, or None if generation fails.
+            For list input, a list with one such entry per text.
     """
     try:
+        if isinstance(text, (list, tuple)):
+            indices_by_lang = {}
+            for i, item in enumerate(text):
+                indices_by_lang.setdefault(detect_language(item), []).append(i)
+
+            buffers = [None] * len(text)
+            for lang, indices in indices_by_lang.items():
+                log.debug("Detected Language: %s", lang)
+                if lang not in supported_languages:
+                    log.warning("Language not supported.")
+                    continue
+
+                results = synthesize_audio_batch([text[i] for i in indices], lang, speed) or []
+                for i, buffer in zip(indices, results):
+                    buffers[i] = buffer
+
+            return buffers
+
         detected_lang = detect_language(text)
-        print(f"🔍 Detected Language: {detected_lang}")
+        log.debug("Detected Language: %s", detected_lang)
 
         if detected_lang in supported_languages:
             return synthesize_audio(text, detected_lang, speed)
         else:
-            print("⚠️ Language not supported.")
+            log.warning("Language not supported.")
             return None
 
     except Exception as e:
-        print(f"⚠️ Error in speak function: {e}")
+        log.warning("Error in speak function: %s", e)
         return None
 
 
@@ -225,20 +616,23 @@ def speak_with_lang(lang, text, speed=1.0):
 
     Args:
         lang (str): The language code to use for speech synthesis.
-        text (str): The input text to be spoken.
+        text (str or list[str]): The input text, or texts synthesized as one batch, to be spoken.
         speed (float, optional): Speed factor (default is 1.0).
 
     Returns:
         io.BytesIO: A buffer containing the generated speech audio, or None if generation fails.
+            For list input, a list with one buffer per text, or None if generation fails.
     """
     try:
         if lang not in supported_languages:
-            print(f"⚠️ Language '{lang}' not supported.")
+            log.warning("Language '%s' not supported.", lang)
             return None
 
-        print(f"🎙️ Using pre-detected language: {lang}")
+        log.debug("Using pre-detected language: %s", lang)
+        if isinstance(text, (list, tuple)):
+            return synthesize_audio_batch(text, lang, speed)
         return synthesize_audio(text, lang, speed)
 
     except Exception as e:
-        print(f"⚠️ Error in speak_with_lang function: {e}")
+        log.warning("Error in speak_with_lang function: %s", e)
         return None